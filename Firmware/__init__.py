@@ -7,9 +7,9 @@ try:
     from .main import RadropiSystem
     from .detection_ai import AsteroidDetector
     from .camera_controller import CameraController
-    from .gps_module import GPSController, MockGPSController
+    from .gps_module import GPSController, MockGPSController, Location
     from .servo_controller import ServoController, MockServoController
-    from .data_logger import DataLogger
+    from .data_logger import DataLogger, DetectionEvent
     
     __all__ = [
         'RadropiSystem',
@@ -17,9 +17,11 @@ try:
         'CameraController',
         'GPSController',
         'MockGPSController',
+        'Location',
         'ServoController',
         'MockServoController',
-        'DataLogger'
+        'DataLogger',
+        'DetectionEvent'
     ]
     
 except ImportError as e:
@@ -57,7 +59,9 @@ def check_dependencies():
         'numpy': False,
         'pynmea2': False,
         'serial': False,
-        'gpio': False
+        'gpio': False,
+        'pigpio': False,
+        'numba': False
     }
     
     try:
@@ -90,6 +94,18 @@ def check_dependencies():
     except ImportError:
         pass
     
+    try:
+        import pigpio
+        dependencies['pigpio'] = True
+    except ImportError:
+        pass
+    
+    try:
+        import numba
+        dependencies['numba'] = True
+    except ImportError:
+        pass
+    
     return dependencies
 
 def print_banner():
@@ -3,13 +3,137 @@ import json
 import csv
 import logging
 import threading
+import queue
+import time
+import atexit
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 import cv2
 import numpy as np
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Column order of the detection CSV log
+_FIELDS = (
+    'timestamp', 'type', 'confidence', 'coordinates_x', 'coordinates_y',
+    'bbox_x', 'bbox_y', 'bbox_w', 'bbox_h', 'area', 'aspect_ratio',
+    'brightness', 'gps_lat', 'gps_lon', 'gps_alt', 'frame_id', 'image_path'
+)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _fill_rect_njit(img, x0, y0, x1, y1, color):
+        # Clip the half-open rectangle [x0, x1) x [y0, y1) to the image
+        x0 = max(x0, 0)
+        y0 = max(y0, 0)
+        x1 = min(x1, img.shape[1])
+        y1 = min(y1, img.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        for c in range(img.shape[2]):
+            img[y0:y1, x0:x1, c] = color[c]
+    
+    @njit(cache=True)
+    def _draw_boxes_njit(img, boxes, colors):
+        """
+        Rasterize rectangles into a BGR image in one compiled call
+        
+        Args:
+            img (np.ndarray): HxWx3 uint8 image, modified in place
+            boxes (np.ndarray): Nx5 int32 rows of (x0, y0, x1, y1, thickness);
+                a negative thickness fills the rectangle like cv2.rectangle
+            colors (np.ndarray): Nx3 uint8 BGR colors
+        """
+        for i in range(boxes.shape[0]):
+            x0, y0, x1, y1, t = boxes[i, 0], boxes[i, 1], boxes[i, 2], boxes[i, 3], boxes[i, 4]
+            color = colors[i]
+            
+            if t < 0:
+                _fill_rect_njit(img, x0, y0, x1 + 1, y1 + 1, color)
+                continue
+            
+            # Edges are centred on the outline, r pixels either side like cv2
+            r = (t + 1) // 2
+            _fill_rect_njit(img, x0 - r, y0 - r, x1 + r + 1, y0 + r + 1, color)
+            _fill_rect_njit(img, x0 - r, y1 - r, x1 + r + 1, y1 + r + 1, color)
+            _fill_rect_njit(img, x0 - r, y0 - r, x0 + r + 1, y1 + r + 1, color)
+            _fill_rect_njit(img, x1 - r, y0 - r, x1 + r + 1, y1 + r + 1, color)
+
+# Compact integer codes for detection types in the in-memory session columns;
+# types outside the known set are stored as 'unknown' so they still decode
+_TYPE_IDS = {'non_meteor': 0, 'meteor': 1, 'asteroid': 2, 'unknown': 3}
+
+class DetectionEvent(NamedTuple):
+    """
+    Immutable detection record accepted by DataLogger.log_detection
+    
+    ``timestamp`` may be epoch seconds or an ISO 8601 string; numeric
+    timestamps are formatted by the log writer thread.
+    """
+    timestamp: Union[float, str]
+    type: str
+    confidence: float
+    coordinates: Tuple[float, float] = (0, 0)
+    bbox: Tuple[int, int, int, int] = (0, 0, 0, 0)
+    area: float = 0
+    aspect_ratio: float = 0
+    brightness: float = 0
+    gps_lat: Optional[float] = None
+    gps_lon: Optional[float] = None
+    gps_alt: Optional[float] = None
+    frame_id: Any = ''
+    image_path: str = ''
+    
+    @classmethod
+    def from_dict(cls, detection_data: Dict) -> 'DetectionEvent':
+        """
+        Build an event from the legacy detection dictionary layout
+        
+        Args:
+            detection_data (Dict): Detection event data
+            
+        Returns:
+            DetectionEvent: Equivalent typed event
+        """
+        properties = detection_data.get('properties') or {}
+        gps_location = detection_data.get('gps_location') or {}
+        return cls(
+            timestamp=detection_data.get('timestamp', ''),
+            type=detection_data.get('type', 'unknown'),
+            confidence=detection_data.get('confidence', 0.0),
+            coordinates=detection_data.get('coordinates', (0, 0)),
+            bbox=detection_data.get('bbox', (0, 0, 0, 0)),
+            area=detection_data.get('area', 0),
+            aspect_ratio=properties.get('aspect_ratio', 0),
+            brightness=properties.get('brightness', 0),
+            gps_lat=gps_location.get('latitude'),
+            gps_lon=gps_location.get('longitude'),
+            gps_alt=gps_location.get('altitude'),
+            frame_id=detection_data.get('frame_id', ''),
+            image_path=detection_data.get('image_path', '')
+        )
+
+def iter_events(path: str) -> Iterator[Dict]:
+    """
+    Iterate over system events stored in a JSON Lines log
+    
+    Args:
+        path (str): Path to a system_events_*.jsonl file
+        
+    Yields:
+        Dict: One logged system event per line
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
 
 class DataLogger:
-    def __init__(self, base_path: str = "/var/log/radropi"):
+    def __init__(self, base_path: str = "/var/log/radropi", image_writers: int = 2):
         self.logger = logging.getLogger('DataLogger')
         self.base_path = base_path
         self.data_lock = threading.Lock()
@@ -41,6 +165,51 @@ class DataLogger:
         }
         
         self._initialize_detection_log()
+        
+        # Structure-of-arrays copy of this session's detections, grown by
+        # doubling; only the first _det_count rows are valid
+        self._det_count = 0
+        self._det_columns = {
+            'timestamp_us': np.empty(1024, dtype=np.int64),
+            'type_id': np.empty(1024, dtype=np.int8),
+            'confidence': np.empty(1024, dtype=np.float32),
+            'bbox': np.empty((1024, 4), dtype=np.int32),
+            'gps_lat': np.empty(1024, dtype=np.float64),
+            'gps_lon': np.empty(1024, dtype=np.float64)
+        }
+        
+        # (epoch second, formatted string) for the frame overlay timestamp
+        self._ts_cache = (0, "")
+        
+        # Detection rows are queued and written by a background thread that
+        # keeps the CSV open and flushes in batches
+        self.flush_interval = 0.1
+        self._row_q = queue.Queue(maxsize=10000)
+        self._csv_fh = open(self.detection_log_file, 'a', newline='', buffering=1 << 20)
+        self._csv_writer = csv.writer(self._csv_fh)
+        self._writer_thread = threading.Thread(target=self._detection_writer_loop)
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+        
+        # Detections are stored as single-channel luminance unless a
+        # detection sets 'color_required' or save_grayscale is turned off
+        self.save_grayscale = True
+        self._jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, 85]
+        self._gray_jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, 90]
+        
+        # Annotated frames are JPEG-encoded and written by worker threads so
+        # save_frame never blocks the detection loop on disk I/O; cv2.imwrite
+        # releases the GIL while encoding, so workers run on separate cores
+        self._img_q = queue.Queue(maxsize=32)
+        self._image_threads = []
+        for _ in range(max(1, image_writers)):
+            thread = threading.Thread(target=self._image_writer_loop)
+            thread.daemon = True
+            thread.start()
+            self._image_threads.append(thread)
+        
+        atexit.register(self.close)
+        
         self.logger.info(f"DataLogger initialized with base path: {base_path}")
     
     def _create_directories(self):
@@ -54,80 +223,214 @@ class DataLogger:
             
             with open(self.detection_log_file, 'a', newline='') as csvfile:
                 if not file_exists or os.path.getsize(self.detection_log_file) == 0:
-                    fieldnames = [
-                        'timestamp', 'type', 'confidence', 'coordinates_x', 'coordinates_y',
-                        'bbox_x', 'bbox_y', 'bbox_w', 'bbox_h', 'area', 'aspect_ratio',
-                        'brightness', 'gps_lat', 'gps_lon', 'gps_alt', 'frame_id', 'image_path'
-                    ]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
+                    csv.writer(csvfile).writerow(_FIELDS)
             
             self.logger.info(f"Detection log initialized: {self.detection_log_file}")
             
         except Exception as e:
             self.logger.error(f"Error initializing detection log: {e}")
     
-    def log_detection(self, detection_data: Dict):
+    def _detection_writer_loop(self):
+        """
+        Background loop writing queued detection rows to the CSV log
+        """
+        pending = False
+        last_flush = time.monotonic()
+        
+        while True:
+            try:
+                row = self._row_q.get(timeout=self.flush_interval)
+                if row is None:
+                    break
+                
+                if not isinstance(row[0], str):
+                    row = (datetime.fromtimestamp(row[0]).isoformat(),) + row[1:]
+                self._csv_writer.writerow(row)
+                pending = True
+                
+            except queue.Empty:
+                pass
+            except Exception as e:
+                self.logger.error(f"Error writing detection log: {e}")
+            
+            if pending and time.monotonic() - last_flush >= self.flush_interval:
+                try:
+                    self._csv_fh.flush()
+                except Exception as e:
+                    self.logger.error(f"Error flushing detection log: {e}")
+                pending = False
+                last_flush = time.monotonic()
+        
+        self._csv_fh.flush()
+    
+    def _image_writer_loop(self):
+        """
+        Background loop encoding and writing queued frames to disk
+        """
+        while True:
+            item = self._img_q.get()
+            if item is None:
+                break
+            
+            filepath, frame, grayscale = item
+            try:
+                if grayscale and frame.ndim == 3:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    params = self._gray_jpeg_params
+                else:
+                    params = self._jpeg_params
+                
+                if cv2.imwrite(filepath, frame, params):
+                    with self.data_lock:
+                        self.session_stats['images_saved'] += 1
+                    self.logger.info(f"Frame saved: {os.path.basename(filepath)}")
+                else:
+                    self.logger.error(f"Failed to save frame: {os.path.basename(filepath)}")
+                    
+            except Exception as e:
+                self.logger.error(f"Error writing frame: {e}")
+    
+    def log_detection(self, event: DetectionEvent):
         """
         Log a detection event to CSV file
         
         Args:
-            detection_data (Dict): Detection event data
+            event (DetectionEvent): Detection event data
         """
         try:
+            # Prepare CSV row in _FIELDS order
+            coordinates = event.coordinates
+            bbox = event.bbox
+            detection_type = event.type
+            timestamp = event.timestamp or time.time()
+            
+            csv_row = (
+                timestamp,
+                detection_type,
+                event.confidence,
+                coordinates[0],
+                coordinates[1],
+                bbox[0],
+                bbox[1],
+                bbox[2],
+                bbox[3],
+                event.area,
+                event.aspect_ratio,
+                event.brightness,
+                event.gps_lat,
+                event.gps_lon,
+                event.gps_alt,
+                event.frame_id,
+                event.image_path
+            )
+            
+            # Hand the row to the writer thread
+            try:
+                self._row_q.put_nowait(csv_row)
+            except queue.Full:
+                self.logger.warning("Detection log queue full, dropping detection")
+                return
+            
+            timestamp_us = self._timestamp_us(timestamp)
+            
             with self.data_lock:
-                # Prepare CSV row
-                csv_row = {
-                    'timestamp': detection_data.get('timestamp', datetime.now().isoformat()),
-                    'type': detection_data.get('type', 'unknown'),
-                    'confidence': detection_data.get('confidence', 0.0),
-                    'coordinates_x': detection_data.get('coordinates', [0, 0])[0],
-                    'coordinates_y': detection_data.get('coordinates', [0, 0])[1],
-                    'bbox_x': detection_data.get('bbox', [0, 0, 0, 0])[0],
-                    'bbox_y': detection_data.get('bbox', [0, 0, 0, 0])[1],
-                    'bbox_w': detection_data.get('bbox', [0, 0, 0, 0])[2],
-                    'bbox_h': detection_data.get('bbox', [0, 0, 0, 0])[3],
-                    'area': detection_data.get('area', 0),
-                    'aspect_ratio': detection_data.get('properties', {}).get('aspect_ratio', 0),
-                    'brightness': detection_data.get('properties', {}).get('brightness', 0),
-                    'gps_lat': detection_data.get('gps_location', {}).get('latitude'),
-                    'gps_lon': detection_data.get('gps_location', {}).get('longitude'),
-                    'gps_alt': detection_data.get('gps_location', {}).get('altitude'),
-                    'frame_id': detection_data.get('frame_id', ''),
-                    'image_path': detection_data.get('image_path', '')
-                }
-                
-                # Write to CSV
-                with open(self.detection_log_file, 'a', newline='') as csvfile:
-                    fieldnames = list(csv_row.keys())
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writerow(csv_row)
-                
                 # Update session statistics
                 self.session_stats['total_detections'] += 1
-                detection_type = detection_data.get('type', 'unknown')
                 if detection_type in self.session_stats['detection_types']:
                     self.session_stats['detection_types'][detection_type] += 1
                 
-                self.logger.debug(f"Detection logged: {detection_type}")
+                # The row is already queued; the in-memory columns are a
+                # secondary copy and must not turn a bad value into a lost event
+                try:
+                    self._append_detection_columns(
+                        timestamp_us,
+                        _TYPE_IDS.get(detection_type, _TYPE_IDS['unknown']),
+                        event.confidence,
+                        bbox,
+                        event.gps_lat,
+                        event.gps_lon
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Detection not added to session columns: {e}")
+            
+            self.logger.debug(f"Detection logged: {detection_type}")
                 
         except Exception as e:
             self.logger.error(f"Error logging detection: {e}")
     
-    def save_frame(self, frame: np.ndarray, detection_data: Dict) -> Optional[str]:
+    def log_detection_dict(self, detection_data: Dict):
+        """
+        Log a detection given in the legacy dictionary layout
+        
+        Args:
+            detection_data (Dict): Detection event data
+        """
+        self.log_detection(DetectionEvent.from_dict(detection_data))
+    
+    def _timestamp_us(self, timestamp: Union[float, str]) -> int:
+        """
+        Convert an event timestamp to integer epoch microseconds
+        
+        Args:
+            timestamp (Union[float, str]): Epoch seconds or an ISO 8601 string
+            
+        Returns:
+            int: Epoch microseconds; the current time if the string cannot
+            be parsed
+        """
+        if not isinstance(timestamp, str):
+            return int(timestamp * 1_000_000)
+        try:
+            return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+        except ValueError:
+            return int(time.time() * 1_000_000)
+    
+    def _append_detection_columns(self, timestamp_us: int, type_id: int, confidence: float,
+                                  bbox, latitude: Optional[float], longitude: Optional[float]):
+        """
+        Append one detection to the in-memory session columns (caller holds data_lock)
+        """
+        columns = self._det_columns
+        n = self._det_count
+        
+        if n == len(columns['type_id']):
+            # Grow every column before swapping any in, so a failure leaves
+            # them all the same length
+            grown = {}
+            for name, column in columns.items():
+                grown[name] = np.empty((2 * n,) + column.shape[1:], dtype=column.dtype)
+                grown[name][:n] = column
+            columns.update(grown)
+        
+        # Slot n only counts once every column has been written
+        columns['timestamp_us'][n] = timestamp_us
+        columns['type_id'][n] = type_id
+        columns['confidence'][n] = confidence
+        columns['bbox'][n] = bbox
+        columns['gps_lat'][n] = np.nan if latitude is None else latitude
+        columns['gps_lon'][n] = np.nan if longitude is None else longitude
+        self._det_count = n + 1
+    
+    def save_frame(self, frame: np.ndarray, detection_data: Dict, in_place: bool = False) -> Optional[str]:
         """
         Save camera frame with detection overlay
         
+        The frame is written asynchronously; the returned path is where the
+        image will appear once the writer thread has encoded it. With
+        in_place=True the overlay is drawn straight into ``frame``, which the
+        caller must then leave untouched until the image has been written.
+        
         Args:
             frame (np.ndarray): Camera frame
             detection_data (Dict): Associated detection data
+            in_place (bool): Draw on the caller's frame instead of a copy
             
         Returns:
             Optional[str]: Path to saved image or None if failed
         """
         try:
-            # Generate filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+            # Generate filename from a millisecond epoch id
+            timestamp = int(time.time() * 1000)
             detection_type = detection_data.get('type', 'unknown')
             confidence = detection_data.get('confidence', 0.0)
             
@@ -135,40 +438,39 @@ class DataLogger:
             filepath = os.path.join(self.paths['images'], filename)
             
             # Create annotated frame
-            annotated_frame = self._annotate_frame(frame, detection_data)
-            
-            # Save image
-            success = cv2.imwrite(filepath, annotated_frame)
+            annotated_frame = self._annotate_frame(frame, detection_data, in_place)
             
-            if success:
-                self.session_stats['images_saved'] += 1
-                self.logger.info(f"Frame saved: {filename}")
-                
-                # Update detection data with image path
-                detection_data['image_path'] = filepath
-                
-                return filepath
-            else:
-                self.logger.error(f"Failed to save frame: {filename}")
+            # Queue the image for the writer thread
+            grayscale = self.save_grayscale and not detection_data.get('color_required', False)
+            try:
+                self._img_q.put_nowait((filepath, annotated_frame, grayscale))
+            except queue.Full:
+                self.logger.warning(f"Image queue full, dropping frame: {filename}")
                 return None
+            
+            # Update detection data with image path
+            detection_data['image_path'] = filepath
+            
+            return filepath
                 
         except Exception as e:
             self.logger.error(f"Error saving frame: {e}")
             return None
     
-    def _annotate_frame(self, frame: np.ndarray, detection_data: Dict) -> np.ndarray:
+    def _annotate_frame(self, frame: np.ndarray, detection_data: Dict, in_place: bool = False) -> np.ndarray:
         """
         Add detection annotations to frame
         
         Args:
             frame (np.ndarray): Original frame
             detection_data (Dict): Detection information
+            in_place (bool): Draw directly on frame instead of a copy
             
         Returns:
             np.ndarray: Annotated frame
         """
         try:
-            annotated = frame.copy()
+            annotated = frame if in_place else frame.copy()
             
             # Get detection info
             bbox = detection_data.get('bbox', [0, 0, 0, 0])
@@ -186,23 +488,34 @@ class DataLogger:
                 }
                 color = colors.get(detection_type, (255, 255, 255))
                 
-                # Draw bounding box
-                cv2.rectangle(annotated, (x, y), (x + w, y + h), color, 2)
-                
                 # Add label
                 label = f"{detection_type}: {confidence:.2f}"
                 label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
                 
-                # Background for text
-                cv2.rectangle(annotated, (x, y - label_size[1] - 10), 
-                            (x + label_size[0], y), color, -1)
+                if NUMBA_AVAILABLE and annotated.ndim == 3:
+                    # Bounding box and text background in a single compiled call
+                    boxes = np.array([
+                        [x, y, x + w, y + h, 2],
+                        [x, y - label_size[1] - 10, x + label_size[0], y, -1]
+                    ], dtype=np.int32)
+                    _draw_boxes_njit(annotated, boxes, np.array([color, color], dtype=np.uint8))
+                else:
+                    # Draw bounding box
+                    cv2.rectangle(annotated, (x, y), (x + w, y + h), color, 2)
+                    
+                    # Background for text
+                    cv2.rectangle(annotated, (x, y - label_size[1] - 10), 
+                                (x + label_size[0], y), color, -1)
                 
                 # Text
                 cv2.putText(annotated, label, (x, y - 5), 
                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
             
-            # Add timestamp
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # Add timestamp, formatted at most once per second
+            now = int(time.time())
+            if now != self._ts_cache[0]:
+                self._ts_cache = (now, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)))
+            timestamp = self._ts_cache[1]
             cv2.putText(annotated, timestamp, (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
@@ -227,25 +540,14 @@ class DataLogger:
                 'data': event_data
             }
             
-            # Save to JSON file
+            # Append one JSON object per line; the file is never re-read
             log_file = os.path.join(
                 self.paths['system_logs'], 
-                f"system_events_{datetime.now().strftime('%Y%m%d')}.json"
+                f"system_events_{datetime.now().strftime('%Y%m%d')}.jsonl"
             )
             
-            # Append to file
-            events = []
-            if os.path.exists(log_file):
-                try:
-                    with open(log_file, 'r') as f:
-                        events = json.load(f)
-                except json.JSONDecodeError:
-                    events = []
-            
-            events.append(event_log)
-            
-            with open(log_file, 'w') as f:
-                json.dump(events, f, indent=2)
+            with open(log_file, 'a') as f:
+                f.write(json.dumps(event_log) + '\n')
             
             self.session_stats['system_events'] += 1
             self.logger.debug(f"System event logged: {event_type}")
@@ -258,7 +560,7 @@ class DataLogger:
         Export session data in specified format
         
         Args:
-            export_format (str): Export format ('json', 'csv')
+            export_format (str): Export format ('json', 'csv', 'npz')
             
         Returns:
             Optional[str]: Path to exported file
@@ -294,6 +596,18 @@ class DataLogger:
                     writer.writerow(['Images Saved', self.session_stats['images_saved']])
                     writer.writerow(['System Events', self.session_stats['system_events']])
             
+            elif export_format.lower() == 'npz':
+                filename = f"session_detections_{timestamp}.npz"
+                filepath = os.path.join(self.paths['exports'], filename)
+                
+                with self.data_lock:
+                    n = self._det_count
+                    columns = {name: column[:n].copy() for name, column in self._det_columns.items()}
+                
+                # type_names[type_id] decodes the type_id column
+                type_names = np.array(sorted(_TYPE_IDS, key=_TYPE_IDS.get))
+                np.savez_compressed(filepath, type_names=type_names, **columns)
+            
             else:
                 self.logger.error(f"Unsupported export format: {export_format}")
                 return None
@@ -327,24 +641,40 @@ class DataLogger:
             days_to_keep (int): Number of days to keep files
         """
         try:
-            import time
             cutoff_time = time.time() - (days_to_keep * 24 * 60 * 60)
             
             cleaned_count = 0
             
-            # Clean up images and logs
+            # Clean up images and logs; DirEntry caches the stat result
             for path in [self.paths['images'], self.paths['detections'], self.paths['system_logs']]:
-                for filename in os.listdir(path):
-                    filepath = os.path.join(path, filename)
-                    if os.path.isfile(filepath) and os.path.getmtime(filepath) < cutoff_time:
-                        os.remove(filepath)
-                        cleaned_count += 1
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff_time:
+                            os.remove(entry.path)
+                            cleaned_count += 1
             
             self.logger.info(f"Cleaned up {cleaned_count} old files")
             
         except Exception as e:
             self.logger.error(f"Error cleaning up old files: {e}")
     
+    def close(self):
+        """
+        Flush queued detection rows and images, then close the detection log
+        """
+        if self._writer_thread.is_alive():
+            self._row_q.put(None)
+            self._writer_thread.join(timeout=5)
+        
+        alive = [thread for thread in self._image_threads if thread.is_alive()]
+        for _ in alive:
+            self._img_q.put(None)
+        for thread in alive:
+            thread.join(timeout=5)
+        
+        if not self._csv_fh.closed:
+            self._csv_fh.close()
+    
     def get_status(self) -> Dict:
         """
         Get data logger status
@@ -2,8 +2,62 @@ import serial
 import threading
 import time
 import logging
-from typing import Optional, Dict, Tuple
-import pynmea2
+import operator
+from functools import reduce
+from typing import Optional, Dict, NamedTuple, Tuple
+
+try:
+    import pynmea2
+    PYNMEA2_AVAILABLE = True
+except ImportError:
+    PYNMEA2_AVAILABLE = False
+
+class Location(NamedTuple):
+    """Immutable GPS fix snapshot; replaced wholesale on every update"""
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    altitude: Optional[float] = None
+    timestamp: Optional[float] = None
+    satellites: int = 0
+    fix_quality: int = 0
+    hdop: Optional[float] = None
+
+def _checksum_ok(body: str, checksum: str) -> bool:
+    """
+    Verify an NMEA checksum (XOR of every byte between '$' and '*')
+    
+    Args:
+        body (str): Sentence contents without the leading '$'
+        checksum (str): Hex digits following '*'
+        
+    Returns:
+        bool: True if the checksum matches
+    """
+    try:
+        expected = int(checksum[:2], 16)
+    except ValueError:
+        return False
+    return reduce(operator.xor, body.encode('ascii', errors='replace'), 0) == expected
+
+def _parse_coordinate(value: str, hemisphere: str) -> Optional[float]:
+    """
+    Convert an NMEA (d)ddmm.mmmm field to signed decimal degrees
+    
+    Args:
+        value (str): Degrees and minutes field
+        hemisphere (str): 'N', 'S', 'E' or 'W'
+        
+    Returns:
+        Optional[float]: Decimal degrees, or None if the field is empty
+    """
+    if not value:
+        return None
+    
+    dot = value.find('.')
+    if dot < 0:
+        dot = len(value)
+    degrees = int(value[:dot - 2]) + float(value[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
 
 class GPSController:
     def __init__(self, port: str = '/dev/ttyUSB0', baudrate: int = 9600):
@@ -13,16 +67,9 @@ class GPSController:
         self.serial_conn = None
         self.running = False
         
-        self.gps_lock = threading.Lock()
-        self.current_location = {
-            'latitude': None,
-            'longitude': None,
-            'altitude': None,
-            'timestamp': None,
-            'satellites': 0,
-            'fix_quality': 0,
-            'hdop': None
-        }
+        # Only the reader thread publishes new snapshots, and rebinding the
+        # attribute is atomic, so readers never need a lock
+        self._location = Location()
         
         self.logger.info(f"GPSController initialized for port {port}")
     
@@ -60,14 +107,15 @@ class GPSController:
         
         while self.running:
             try:
-                if self.serial_conn and self.serial_conn.in_waiting > 0:
-                    # Read NMEA sentence
-                    line = self.serial_conn.readline().decode('ascii', errors='replace').strip()
-                    
-                    if line.startswith('$'):
-                        self._parse_nmea_sentence(line)
+                # Block until a full NMEA sentence arrives; the serial
+                # timeout returns an empty line so `running` is re-checked
+                raw = self.serial_conn.readline()
+                
+                # Drop timeouts and line noise before touching the decoder
+                if not raw.startswith(b'$'):
+                    continue
                 
-                time.sleep(0.1)  # Small delay to prevent CPU overload
+                self._parse_nmea_sentence(raw.decode('ascii', errors='replace').strip())
                 
             except Exception as e:
                 self.logger.error(f"Error in GPS reading loop: {e}")
@@ -79,19 +127,70 @@ class GPSController:
         """
         Parse NMEA sentence and update GPS data
         
+        GGA, RMC and GSA are fixed-format comma-separated records, so they
+        are split and converted directly; pynmea2 is only consulted when a
+        sentence does not fit the expected layout.
+        
         Args:
             sentence (str): NMEA sentence string
         """
+        body, _, checksum = sentence[1:].partition('*')
+        if checksum and not _checksum_ok(body, checksum):
+            return
+        
+        parts = body.split(',')
+        tag = parts[0][2:]  # drop the talker ID (GP, GN, GL, ...)
+        
+        try:
+            if tag == 'GGA':  # Global Positioning System Fix Data
+                self._update_gga_data(
+                    _parse_coordinate(parts[2], parts[3]),
+                    _parse_coordinate(parts[4], parts[5]),
+                    float(parts[9]) if parts[9] else None,
+                    int(parts[7]) if parts[7] else 0,
+                    int(parts[6]) if parts[6] else 0,
+                    float(parts[8]) if parts[8] else None
+                )
+            elif tag == 'RMC':  # Recommended Minimum Course
+                self._update_rmc_data(
+                    _parse_coordinate(parts[3], parts[4]),
+                    _parse_coordinate(parts[5], parts[6])
+                )
+            elif tag == 'GSA':  # GPS DOP and active satellites
+                self._update_gsa_data(float(parts[16]) if parts[16] else None)
+        except (ValueError, IndexError):
+            self._parse_nmea_fallback(sentence)
+        except Exception as e:
+            self.logger.warning(f"Error parsing NMEA sentence: {e}")
+    
+    def _parse_nmea_fallback(self, sentence: str):
+        """
+        Parse a sentence the fast path rejected using pynmea2, if installed
+        
+        Args:
+            sentence (str): NMEA sentence string
+        """
+        if not PYNMEA2_AVAILABLE:
+            return
+        
         try:
             msg = pynmea2.parse(sentence)
             
-            # Handle different NMEA message types
-            if isinstance(msg, pynmea2.GGA):  # Global Positioning System Fix Data
-                self._update_gga_data(msg)
-            elif isinstance(msg, pynmea2.RMC):  # Recommended Minimum Course
-                self._update_rmc_data(msg)
-            elif isinstance(msg, pynmea2.GSA):  # GPS DOP and active satellites
-                self._update_gsa_data(msg)
+            if isinstance(msg, pynmea2.GGA):
+                if msg.latitude and msg.longitude:
+                    self._update_gga_data(
+                        float(msg.latitude),
+                        float(msg.longitude),
+                        float(msg.altitude) if msg.altitude else None,
+                        int(msg.num_sats) if msg.num_sats else 0,
+                        int(msg.gps_qual) if msg.gps_qual else 0,
+                        float(msg.horizontal_dil) if msg.horizontal_dil else None
+                    )
+            elif isinstance(msg, pynmea2.RMC):
+                if msg.latitude and msg.longitude:
+                    self._update_rmc_data(float(msg.latitude), float(msg.longitude))
+            elif isinstance(msg, pynmea2.GSA):
+                self._update_gsa_data(float(msg.hdop) if msg.hdop else None)
                 
         except pynmea2.ParseError:
             # Ignore parse errors for malformed sentences
@@ -99,46 +198,60 @@ class GPSController:
         except Exception as e:
             self.logger.warning(f"Error parsing NMEA sentence: {e}")
     
-    def _update_gga_data(self, msg):
+    def _update_gga_data(self, latitude: Optional[float], longitude: Optional[float],
+                         altitude: Optional[float], satellites: int,
+                         fix_quality: int, hdop: Optional[float]):
         """
-        Update GPS data from GGA message
+        Update GPS data from GGA fields
         
         Args:
-            msg: Parsed GGA message
+            latitude (float): Latitude in decimal degrees
+            longitude (float): Longitude in decimal degrees
+            altitude (float): Altitude above mean sea level in metres
+            satellites (int): Number of satellites in use
+            fix_quality (int): GGA fix quality indicator
+            hdop (float): Horizontal dilution of precision
         """
-        with self.gps_lock:
-            if msg.latitude and msg.longitude:
-                self.current_location['latitude'] = float(msg.latitude)
-                self.current_location['longitude'] = float(msg.longitude)
-                self.current_location['altitude'] = float(msg.altitude) if msg.altitude else None
-                self.current_location['satellites'] = int(msg.num_sats) if msg.num_sats else 0
-                self.current_location['fix_quality'] = int(msg.gps_qual) if msg.gps_qual else 0
-                self.current_location['hdop'] = float(msg.horizontal_dil) if msg.horizontal_dil else None
-                self.current_location['timestamp'] = time.time()
+        if latitude is not None and longitude is not None:
+            self._location = Location(
+                latitude=latitude,
+                longitude=longitude,
+                altitude=altitude,
+                timestamp=time.time(),
+                satellites=satellites,
+                fix_quality=fix_quality,
+                hdop=hdop
+            )
     
-    def _update_rmc_data(self, msg):
+    def _update_rmc_data(self, latitude: Optional[float], longitude: Optional[float]):
         """
-        Update GPS data from RMC message
+        Update GPS data from RMC fields
         
         Args:
-            msg: Parsed RMC message
+            latitude (float): Latitude in decimal degrees
+            longitude (float): Longitude in decimal degrees
         """
-        with self.gps_lock:
-            if msg.latitude and msg.longitude:
-                self.current_location['latitude'] = float(msg.latitude)
-                self.current_location['longitude'] = float(msg.longitude)
-                self.current_location['timestamp'] = time.time()
+        if latitude is not None and longitude is not None:
+            self._location = self._location._replace(
+                latitude=latitude,
+                longitude=longitude,
+                timestamp=time.time()
+            )
     
-    def _update_gsa_data(self, msg):
+    def _update_gsa_data(self, hdop: Optional[float]):
         """
-        Update GPS data from GSA message
+        Update GPS data from GSA fields
         
         Args:
-            msg: Parsed GSA message
+            hdop (float): Horizontal dilution of precision
         """
-        with self.gps_lock:
-            if msg.hdop:
-                self.current_location['hdop'] = float(msg.hdop)
+        if hdop:
+            self._location = self._location._replace(hdop=hdop)
+    
+    @property
+    def location(self) -> Location:
+        """Current fix as an immutable snapshot (no copy, no lock)"""
+        return self._location
     
     def get_location(self) -> Dict:
         """
@@ -147,8 +260,7 @@ class GPSController:
         Returns:
             Dict: Current location information
         """
-        with self.gps_lock:
-            return self.current_location.copy()
+        return self._location._asdict()
     
     def get_coordinates(self) -> Optional[Tuple[float, float]]:
         """
@@ -157,10 +269,10 @@ class GPSController:
         Returns:
             Optional[Tuple[float, float]]: (latitude, longitude) or None if no fix
         """
-        location = self.get_location()
+        location = self._location
         
-        if location['latitude'] is not None and location['longitude'] is not None:
-            return (location['latitude'], location['longitude'])
+        if location.latitude is not None and location.longitude is not None:
+            return (location.latitude, location.longitude)
         
         return None
     
@@ -171,11 +283,11 @@ class GPSController:
         Returns:
             bool: True if GPS has valid fix
         """
-        location = self.get_location()
+        location = self._location
         return (
-            location['latitude'] is not None and 
-            location['longitude'] is not None and
-            location['fix_quality'] > 0
+            location.latitude is not None and 
+            location.longitude is not None and
+            location.fix_quality > 0
         )
     
     def get_fix_quality_description(self) -> str:
@@ -185,7 +297,7 @@ class GPSController:
         Returns:
             str: Fix quality description
         """
-        quality = self.current_location['fix_quality']
+        quality = self._location.fix_quality
         
         quality_descriptions = {
             0: "No fix",
@@ -217,10 +329,10 @@ class GPSController:
         
         while time.time() - start_time < timeout:
             if self.has_fix():
-                location = self.get_location()
+                location = self._location
                 self.logger.info(
-                    f"GPS fix acquired: {location['latitude']:.6f}, "
-                    f"{location['longitude']:.6f} (Quality: {self.get_fix_quality_description()})"
+                    f"GPS fix acquired: {location.latitude:.6f}, "
+                    f"{location.longitude:.6f} (Quality: {self.get_fix_quality_description()})"
                 )
                 return True
             
@@ -236,13 +348,13 @@ class GPSController:
         Returns:
             Dict: Satellite information
         """
-        location = self.get_location()
+        location = self._location
         
         return {
-            'satellites_used': location['satellites'],
-            'fix_quality': location['fix_quality'],
+            'satellites_used': location.satellites,
+            'fix_quality': location.fix_quality,
             'fix_description': self.get_fix_quality_description(),
-            'hdop': location['hdop'],
+            'hdop': location.hdop,
             'has_fix': self.has_fix()
         }
     
@@ -253,15 +365,15 @@ class GPSController:
         Returns:
             Dict: GPS status information
         """
-        location = self.get_location()
+        location = self._location
         
         return {
             'running': self.running,
             'connected': self.serial_conn is not None and self.serial_conn.is_open,
             'has_fix': self.has_fix(),
-            'satellites': location['satellites'],
-            'fix_quality': location['fix_quality'],
-            'last_update': location['timestamp']
+            'satellites': location.satellites,
+            'fix_quality': location.fix_quality,
+            'last_update': location.timestamp
         }
     
     def stop(self):
@@ -294,16 +406,15 @@ class MockGPSController(GPSController):
         self.running = False
         
         # Mock location (example coordinates)
-        self.gps_lock = threading.Lock()
-        self.current_location = {
-            'latitude': 40.7128,   # New York City
-            'longitude': -74.0060,
-            'altitude': 10.0,
-            'timestamp': time.time(),
-            'satellites': 8,
-            'fix_quality': 1,
-            'hdop': 1.2
-        }
+        self._location = Location(
+            latitude=40.7128,   # New York City
+            longitude=-74.0060,
+            altitude=10.0,
+            timestamp=time.time(),
+            satellites=8,
+            fix_quality=1,
+            hdop=1.2
+        )
         
         self.logger.info("MockGPSController initialized")
     
@@ -1,14 +1,16 @@
+import os
 import time
 import threading
+import queue
 import logging
-from datetime import datetime
+from typing import Optional
 import json
 
 from camera_controller import CameraController
 from gps_module import GPSController
 from servo_controller import ServoController
 from detection_ai import AsteroidDetector
-from data_logger import DataLogger
+from data_logger import DataLogger, DetectionEvent
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +21,16 @@ logging.basicConfig(
     ]
 )
 
+# The camera and detector run parallel Numba kernels from the pipeline's
+# worker threads. Prefer OpenMP: the TBB layer can hang interpreter exit
+# after running on a non-main thread. The layer is picked at the first
+# parallel launch, so this only has to happen before the pipeline starts.
+try:
+    from numba import config as numba_config
+    numba_config.THREADING_LAYER_PRIORITY = ['omp', 'tbb', 'workqueue']
+except ImportError:
+    pass
+
 class RadropiSystem:
     def __init__(self):
         self.logger = logging.getLogger('RadropiSystem')
@@ -30,6 +42,40 @@ class RadropiSystem:
         self.detector = AsteroidDetector()
         self.data_logger = DataLogger()
         
+        # Bounded depth of the capture->analyze and analyze->output queues
+        self.pipeline_depth = 4
+        # Target capture period in seconds (10 fps)
+        self.frame_interval = 0.1
+        self.frames_dropped = 0
+        # Sequence number of the last captured frame; used as the frame ID
+        self._frame_seq = 0
+        
+        # get_system_status results are reused for status_ttl seconds
+        self.status_ttl = 1.0
+        self._status_lock = threading.Lock()
+        self._status_cache = None
+        self._status_cache_ts = 0.0
+        # Skip analysis while more than this many frames await output
+        self.output_high_water = 2
+        self.frames_skipped = 0
+        
+        # CPU cores and niceness per thread; this is the whole core layout.
+        # Enhancement and detection both run in the analysis stage, whose
+        # OpenCV and Numba kernels get two cores to spread over; capture
+        # only grabs and copies raw frames, so the light output stage can
+        # share core 0 with it. The servo motion worker runs SCHED_FIFO and
+        # spins out each step deadline, so it gets core 3 to itself (boot
+        # with isolcpus=3). Pinning is skipped on machines with fewer than
+        # four cores.
+        self.stage_affinity = {
+            'capture': ({0}, -5),
+            'analysis': ({1, 2}, 0),
+            'output': ({0}, 0),
+            'motion': ({3}, 0)
+        }
+        # The servo worker pins itself through the same helper as the stages
+        self.servos.pin_motion_thread = lambda: self._pin_stage('motion')
+        
         self.detection_count = {
             'meteor': 0,
             'asteroid': 0,
@@ -52,7 +98,8 @@ class RadropiSystem:
             self.servos.initialize()
             self.logger.info("Servo tracking system initialized")
             
-            self.detector.load_model()
+            # Seed the background model from a live frame while loading
+            self.detector.load_model(self.camera.capture_frame())
             self.logger.info("AI detection model loaded")
             
             self.running = True
@@ -63,22 +110,49 @@ class RadropiSystem:
             self.shutdown()
     
     def main_detection_loop(self):
+        """
+        Run detection as a three-stage pipeline
+        
+        A capture thread feeds raw frames to this (analysis) thread, which
+        enhances and analyzes them and hands frames with detections to an output thread for logging and tracking.
+        Bounded queues between the stages provide back-pressure.
+        """
         self.logger.info("Starting main detection loop")
         
+        read_q = queue.Queue(maxsize=self.pipeline_depth)
+        write_q = queue.Queue(maxsize=self.pipeline_depth)
+        
+        capture_thread = threading.Thread(target=self._capture_stage, args=(read_q,))
+        capture_thread.daemon = True
+        output_thread = threading.Thread(target=self._output_stage, args=(write_q,))
+        output_thread.daemon = True
+        capture_thread.start()
+        output_thread.start()
+        self._pin_stage('analysis')
+        
         while self.running:
             try:
-                frame = self.camera.capture_frame()
+                try:
+                    item = read_q.get(timeout=1)
+                except queue.Empty:
+                    continue
                 
-                if frame is not None:
-                    detections = self.detector.analyze_frame(frame)
-                    
-                    for detection in detections:
-                        self.process_detection(detection, frame)
-                    
-                    if detections:
-                        self.servos.track_objects(detections)
+                if item is None:
+                    break
+                
+                frame_id, frame_ts, frame = item
+                
+                # Output is backed up (disk or servos); events are sparse and
+                # span many frames, so shed analysis work rather than queue it
+                if write_q.qsize() > self.output_high_water:
+                    self.frames_skipped += 1
+                    continue
+                
+                frame = self.camera.enhance_frame(frame)
+                detections = self.detector.analyze_frame(frame)
                 
-                time.sleep(0.1)
+                if detections:
+                    write_q.put((frame_id, frame_ts, frame, detections))
                 
             except KeyboardInterrupt:
                 self.logger.info("Received shutdown signal")
@@ -87,9 +161,108 @@ class RadropiSystem:
                 self.logger.error(f"Error in detection loop: {e}")
                 time.sleep(1)
         
+        self.running = False
+        write_q.put(None)
+        capture_thread.join(timeout=5)
+        output_thread.join(timeout=5)
+        
         self.shutdown()
     
-    def process_detection(self, detection, frame):
+    def _pin_stage(self, stage: str):
+        """
+        Pin the calling thread to its stage's cores and set its niceness
+        
+        Args:
+            stage (str): Key into stage_affinity
+        """
+        if (os.cpu_count() or 1) < 4 or not hasattr(os, 'sched_setaffinity'):
+            return
+        
+        cores, niceness = self.stage_affinity[stage]
+        try:
+            # pid 0 addresses the calling thread on Linux
+            os.sched_setaffinity(0, cores)
+            if niceness:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+            self.logger.info(f"{stage} stage pinned to cores {sorted(cores)} (nice {niceness})")
+        except OSError as e:
+            self.logger.warning(f"Could not set scheduling for {stage} stage: {e}")
+    
+    def _capture_stage(self, read_q: queue.Queue):
+        """
+        Pipeline stage 1: capture raw frames and queue them for analysis
+        
+        Enhancement is left to the analysis stage so its parallel kernels
+        run on the analysis cores rather than on this single pinned core.
+        
+        Frames are paced against a monotonic schedule so capture and queueing
+        time count toward the frame interval. When analysis falls behind and
+        the queue is full, the oldest queued frame is dropped in favour of
+        the new one.
+        """
+        self._pin_stage('capture')
+        next_frame = time.monotonic()
+        
+        while self.running:
+            try:
+                frame = self.camera.capture_frame(enhance=False)
+                
+                if frame is not None:
+                    # The raw view aliases a capture buffer that is reused
+                    # long before a queued frame is analyzed
+                    frame = frame.copy()
+                    self._frame_seq += 1
+                    item = (self._frame_seq, time.time(), frame)
+                    try:
+                        read_q.put_nowait(item)
+                    except queue.Full:
+                        try:
+                            read_q.get_nowait()
+                            self.frames_dropped += 1
+                        except queue.Empty:
+                            pass
+                        read_q.put_nowait(item)
+                
+                next_frame += self.frame_interval
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Overran the schedule; restart it rather than bursting
+                    next_frame = time.monotonic()
+                
+            except Exception as e:
+                self.logger.error(f"Error in capture stage: {e}")
+                time.sleep(1)
+        
+        try:
+            read_q.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def _output_stage(self, write_q: queue.Queue):
+        """
+        Pipeline stage 3: log detections, save frames and track objects
+        """
+        self._pin_stage('output')
+        
+        while True:
+            item = write_q.get()
+            if item is None:
+                break
+            
+            frame_id, frame_ts, frame, detections = item
+            try:
+                for detection in detections:
+                    self.process_detection(detection, frame, frame_id, frame_ts)
+                
+                self.servos.track_objects(detections)
+                
+            except Exception as e:
+                self.logger.error(f"Error in output stage: {e}")
+    
+    def process_detection(self, detection, frame, frame_id: int = 0,
+                          frame_ts: Optional[float] = None):
         try:
             object_type = detection['type']
             confidence = detection['confidence']
@@ -98,19 +271,27 @@ class RadropiSystem:
             if object_type in self.detection_count:
                 self.detection_count[object_type] += 1
             
-            timestamp = datetime.now().isoformat()
-            gps_location = self.gps.get_location()
+            # Epoch seconds; the data logger formats it off this thread
+            timestamp = frame_ts if frame_ts is not None else time.time()
+            gps_location = self.gps.location
+            properties = detection.get('properties', {})
             
-            detection_data = {
-                'timestamp': timestamp,
-                'type': object_type,
-                'confidence': confidence,
-                'coordinates': coordinates,
-                'gps_location': gps_location,
-                'frame_id': id(frame)
-            }
+            event = DetectionEvent(
+                timestamp=timestamp,
+                type=object_type,
+                confidence=confidence,
+                coordinates=coordinates,
+                bbox=detection.get('bbox', (0, 0, 0, 0)),
+                area=detection.get('area', 0),
+                aspect_ratio=properties.get('aspect_ratio', 0),
+                brightness=properties.get('brightness', 0),
+                gps_lat=gps_location.latitude,
+                gps_lon=gps_location.longitude,
+                gps_alt=gps_location.altitude,
+                frame_id=frame_id
+            )
             
-            self.data_logger.log_detection(detection_data)
+            self.data_logger.log_detection(event)
             
             self.logger.info(
                 f"Detection: {object_type} (confidence: {confidence:.2f}) "
@@ -118,20 +299,43 @@ class RadropiSystem:
             )
             
             if confidence > 0.8 and object_type in ['meteor', 'asteroid']:
+                detection_data = {
+                    'type': object_type,
+                    'confidence': confidence,
+                    'bbox': event.bbox
+                }
                 self.data_logger.save_frame(frame, detection_data)
             
         except Exception as e:
             self.logger.error(f"Error processing detection: {e}")
     
     def get_system_status(self):
-        return {
+        """
+        Get overall system status, refreshed at most once per status_ttl
+        
+        Returns:
+            Dict: System and subsystem status
+        """
+        now = time.monotonic()
+        with self._status_lock:
+            if self._status_cache is not None and now - self._status_cache_ts < self.status_ttl:
+                return self._status_cache
+        
+        status = {
             'running': self.running,
-            'detection_count': self.detection_count,
+            'detection_count': dict(self.detection_count),
+            'frames_dropped': self.frames_dropped,
+            'frames_skipped': self.frames_skipped,
             'gps_status': self.gps.get_status(),
             'camera_status': self.camera.get_status(),
             'servo_status': self.servos.get_status(),
             'uptime': time.time() - self.start_time if hasattr(self, 'start_time') else 0
         }
+        
+        with self._status_lock:
+            self._status_cache = status
+            self._status_cache_ts = now
+        return status
     
     def shutdown(self):
         self.logger.info("Shutting down Radropi system...")
@@ -147,6 +351,9 @@ class RadropiSystem:
         if hasattr(self, 'servos'):
             self.servos.shutdown()
         
+        if hasattr(self, 'data_logger'):
+            self.data_logger.close()
+        
         self.logger.info(f"Final detection count: {self.detection_count}")
         self.logger.info("Radropi system shutdown complete")
 
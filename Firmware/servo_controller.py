@@ -1,19 +1,483 @@
+import os
 import time
 import logging
 import threading
-from typing import List, Dict, Tuple
+import queue
+import struct
+from abc import ABC, abstractmethod
+from array import array
+from typing import Callable, List, Dict, Optional, Tuple
+import numpy as np
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except ImportError:
+    SERIAL_AVAILABLE = False
+
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    PIGPIO_AVAILABLE = False
+
 try:
     import RPi.GPIO as GPIO
     GPIO_AVAILABLE = True
 except ImportError:
     GPIO_AVAILABLE = False
-    logging.warning("RPi.GPIO not available, using mock servo controller")
+    if not PIGPIO_AVAILABLE:
+        logging.warning("RPi.GPIO not available, using mock servo controller")
 
-class ServoController:
+# Servo frame rate and pulse range: 500 us (0 degrees) to 2500 us (180 degrees)
+SERVO_FREQUENCY = 50
+SERVO_MIN_PULSE_US = 500
+SERVO_MAX_PULSE_US = 2500
+
+# Kernel PWM chip and the channel wired to each hardware-PWM capable pin
+# (needs dtoverlay=pwm-2chan,pin=18,func=2,pin2=19,func2=2 in config.txt)
+PWM_SYSFS_CHIP = '/sys/class/pwm/pwmchip0'
+HW_PWM_CHANNELS = {18: 0, 19: 1}
+
+def angle_to_pulse_us(angle: float) -> float:
+    """
+    Convert a servo angle to a pulse width
+    
+    Args:
+        angle (float): Angle in degrees (0-180)
+        
+    Returns:
+        float: Pulse width in microseconds
+    """
+    return SERVO_MIN_PULSE_US + angle * ((SERVO_MAX_PULSE_US - SERVO_MIN_PULSE_US) / 180.0)
+
+def _plan_moves(starts, goals, v_max, accel, dt):
+    """
+    Sample trapezoidal-velocity moves for several servos at once
+    
+    Compiled with Numba when it is available; the same code runs as plain
+    Python otherwise.
+    
+    Args:
+        starts (np.ndarray): Start angle per servo in degrees
+        goals (np.ndarray): Goal angle per servo in degrees
+        v_max (float): Cruise speed in degrees per second
+        accel (float): Acceleration in degrees per second squared
+        dt (float): Sample period in seconds
+        
+    Returns:
+        np.ndarray: Frames x servos angle table; the last row is ``goals``
+        and servos that arrive early hold their goal until the longest move
+        finishes
+    """
+    n = starts.shape[0]
+    t_acc = np.empty(n)
+    t_cruise = np.empty(n)
+    speed = np.empty(n)
+    t_total = np.empty(n)
+    steps = np.empty(n, dtype=np.int64)
+    frames = 1
+    for j in range(n):
+        distance = abs(goals[j] - starts[j])
+        if distance == 0:
+            steps[j] = 1
+            continue
+        ta = v_max / accel
+        vm = v_max
+        if accel * ta * ta > distance:
+            # Triangular profile: never reaches cruise speed
+            ta = np.sqrt(distance / accel)
+            vm = accel * ta
+        t_acc[j] = ta
+        speed[j] = vm
+        t_cruise[j] = (distance - accel * ta * ta) / vm
+        t_total[j] = 2 * ta + t_cruise[j]
+        steps[j] = max(1, int(np.ceil(t_total[j] / dt)))
+        frames = max(frames, steps[j])
+    
+    table = np.empty((frames, n))
+    for j in range(n):
+        ta = t_acc[j]
+        tc = t_cruise[j]
+        vm = speed[j]
+        direction = 1.0 if goals[j] >= starts[j] else -1.0
+        for i in range(frames):
+            if i >= steps[j] - 1:
+                table[i, j] = goals[j]
+                continue
+            t = min((i + 1) * dt, t_total[j])
+            if t < ta:
+                travelled = 0.5 * accel * t * t
+            else:
+                t_dec = max(t - ta - tc, 0.0)
+                travelled = (0.5 * accel * ta * ta + vm * min(t - ta, tc)
+                             + vm * t_dec - 0.5 * accel * t_dec * t_dec)
+            table[i, j] = starts[j] + direction * travelled
+    return table
+
+if NUMBA_AVAILABLE:
+    _plan_moves = njit(cache=True)(_plan_moves)
+
+class _Backend(ABC):
+    """
+    Pulse generator driving a set of servo pins
+    """
+    name = 'none'
+    
+    @abstractmethod
+    def setup(self, pins: List[int]):
+        """
+        Prepare the given GPIO pins for servo output
+        
+        Args:
+            pins (List[int]): BCM pin numbers
+        """
+    
+    @abstractmethod
+    def set_pulse(self, pin: int, pulse_us: float):
+        """
+        Set the pulse width generated on a pin
+        
+        Args:
+            pin (int): BCM pin number
+            pulse_us (float): Pulse width in microseconds
+        """
+    
+    def play(self, pins: List[int], pulses_us: np.ndarray,
+             preempted: Optional[Callable[[], bool]] = None) -> Optional[int]:
+        """
+        Emit pulse-width sequences on several pins in lock-step, one pulse
+        per pin per servo frame, and wait for them to finish
+        
+        Args:
+            pins (List[int]): BCM pin numbers
+            pulses_us (np.ndarray): Frames x pins array of pulse widths in
+                microseconds
+            preempted (Callable[[], bool], optional): Polled while playing;
+                returning True stops the sequence early
+            
+        Returns:
+            Optional[int]: Number of frames emitted, or None if the backend
+            cannot play sequences in hardware
+        """
+        return None
+    
+    @abstractmethod
+    def close(self):
+        """
+        Stop all pulses and release the hardware
+        """
+
+class _PigpioBackend(_Backend):
+    """
+    DMA-timed servo pulses through the pigpio daemon
+    """
+    name = 'pigpio'
+    
     def __init__(self):
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpio daemon not running")
+        self.pins = []
+    
+    def setup(self, pins: List[int]):
+        self.pins = list(pins)
+        for pin in self.pins:
+            self.pi.set_mode(pin, pigpio.OUTPUT)
+    
+    def set_pulse(self, pin: int, pulse_us: float):
+        self.pi.set_servo_pulsewidth(pin, int(pulse_us))
+    
+    # Frames per waveform chunk; a newer command takes over within two chunks
+    chunk_frames = 5
+    
+    def _frame_pulses(self, pins: List[int], widths: List[List[int]]) -> list:
+        """
+        Build the generic pulses for a run of servo frames
+        
+        Each frame raises every pin together, then drops them in order of
+        increasing pulse width.
+        """
+        frame_us = 1000000 // SERVO_FREQUENCY
+        masks = [1 << pin for pin in pins]
+        all_on = sum(masks)
+        pulses = []
+        for row in widths:
+            order = sorted(range(len(pins)), key=row.__getitem__)
+            elapsed = row[order[0]]
+            pulses.append(pigpio.pulse(all_on, 0, elapsed))
+            for k, j in enumerate(order):
+                until = row[order[k + 1]] if k + 1 < len(order) else frame_us
+                pulses.append(pigpio.pulse(0, masks[j], until - elapsed))
+                elapsed = until
+        return pulses
+    
+    def play(self, pins: List[int], pulses_us: np.ndarray,
+             preempted: Optional[Callable[[], bool]] = None) -> Optional[int]:
+        frame_s = 1.0 / SERVO_FREQUENCY
+        widths = pulses_us.astype(np.int32).tolist()
+        chunks = [widths[i:i + self.chunk_frames]
+                  for i in range(0, len(widths), self.chunk_frames)]
+        
+        if (len(pins) + 1) * self.chunk_frames * 2 > self.pi.wave_get_max_pulses():
+            return None
+        
+        # The waveform replaces the servo pulse generator on these pins
+        # while it plays. Chunks are queued one ahead with SYNC mode so they
+        # join without a gap, and the next chunk is only built once the
+        # previous one has finished, which is where a newer command cuts in.
+        self.pi.wave_clear()
+        
+        played = 0
+        current = None
+        for chunk in chunks:
+            if preempted is not None and preempted():
+                break
+            self.pi.wave_add_generic(self._frame_pulses(pins, chunk))
+            wave_id = self.pi.wave_create()
+            if current is None:
+                for pin in pins:
+                    self.pi.set_servo_pulsewidth(pin, 0)
+            self.pi.wave_send_using_mode(wave_id, pigpio.WAVE_MODE_ONE_SHOT_SYNC)
+            played += len(chunk)
+            if current is not None:
+                while self.pi.wave_tx_at() == current:
+                    time.sleep(frame_s / 4)
+                self.pi.wave_delete(current)
+            current = wave_id
+        
+        if current is not None:
+            while self.pi.wave_tx_busy():
+                time.sleep(frame_s / 4)
+            self.pi.wave_delete(current)
+            for pin, us in zip(pins, widths[played - 1]):
+                self.pi.set_servo_pulsewidth(pin, us)
+        return played
+    
+    def close(self):
+        for pin in self.pins:
+            self.pi.set_servo_pulsewidth(pin, 0)
+        self.pi.stop()
+
+class _GpioBackend(_Backend):
+    """
+    Software PWM through RPi.GPIO
+    """
+    name = 'RPi.GPIO'
+    
+    def __init__(self):
+        self.pwm = {}
+    
+    def setup(self, pins: List[int]):
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        if pins:
+            GPIO.setup(list(pins), GPIO.OUT)
+        for pin in pins:
+            pwm = GPIO.PWM(pin, SERVO_FREQUENCY)
+            pwm.start(0)
+            self.pwm[pin] = pwm
+    
+    def set_pulse(self, pin: int, pulse_us: float):
+        # Duty cycle in percent of the 20 ms frame
+        self.pwm[pin].ChangeDutyCycle(pulse_us * (SERVO_FREQUENCY / 10000.0))
+    
+    def close(self):
+        for pwm in self.pwm.values():
+            pwm.stop()
+        GPIO.cleanup()
+
+class _SysfsPwm:
+    """
+    One hardware PWM channel driven through /sys/class/pwm
+    """
+    
+    def __init__(self, chip: str, channel: int):
+        self.chip = chip
+        self.channel = channel
+        self.path = os.path.join(chip, f'pwm{channel}')
+        
+        if not os.path.isdir(self.path):
+            self._write(os.path.join(chip, 'export'), channel)
+            # udev needs a moment to create the channel attributes
+            deadline = time.monotonic() + 1.0
+            while not os.access(os.path.join(self.path, 'enable'), os.W_OK):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"PWM channel {channel} did not appear")
+                time.sleep(0.01)
+        
+        self._write(os.path.join(self.path, 'period'), 1000000000 // SERVO_FREQUENCY)
+        self._duty_fd = os.open(os.path.join(self.path, 'duty_cycle'), os.O_WRONLY)
+        self.set_duty_ns(0)
+        self._write(os.path.join(self.path, 'enable'), 1)
+    
+    @staticmethod
+    def _write(path: str, value: int):
+        with open(path, 'w') as f:
+            f.write(str(value))
+    
+    def set_duty_ns(self, duty_ns: int):
+        """
+        Set the high time of each PWM period
+        
+        Args:
+            duty_ns (int): High time in nanoseconds
+        """
+        os.pwrite(self._duty_fd, str(duty_ns).encode(), 0)
+    
+    def close(self):
+        self.set_duty_ns(0)
+        os.close(self._duty_fd)
+        self._write(os.path.join(self.path, 'enable'), 0)
+        self._write(os.path.join(self.chip, 'unexport'), self.channel)
+
+class _HwPwmBackend(_Backend):
+    """
+    Kernel hardware PWM for the dish servos, with the remaining pins on a
+    software backend
+    """
+    
+    def __init__(self, fallback: _Backend, chip: str):
+        self.fallback = fallback
+        self.chip = chip
+        self.channels = {}
+        self.name = f'sysfs-pwm+{fallback.name}'
+    
+    def setup(self, pins: List[int]):
+        for pin in pins:
+            if pin in HW_PWM_CHANNELS:
+                try:
+                    self.channels[pin] = _SysfsPwm(self.chip, HW_PWM_CHANNELS[pin])
+                except (OSError, RuntimeError) as e:
+                    logging.getLogger('ServoController').warning(
+                        f"Hardware PWM unavailable on GPIO{pin} ({e}), using software PWM"
+                    )
+        # The fallback must not touch the hardware PWM pins, or it would
+        # switch them out of their PWM alternate function
+        self.fallback.setup([pin for pin in pins if pin not in self.channels])
+    
+    def set_pulse(self, pin: int, pulse_us: float):
+        channel = self.channels.get(pin)
+        if channel is not None:
+            channel.set_duty_ns(int(pulse_us * 1000))
+        else:
+            self.fallback.set_pulse(pin, pulse_us)
+    
+    def close(self):
+        for channel in self.channels.values():
+            channel.close()
+        self.channels = {}
+        self.fallback.close()
+
+class _SerialBackend(_Backend):
+    """
+    Servo pulses generated by an Arduino that receives widths over UART
+    
+    Each command is a 4-byte packet ``struct.pack('<BBH', cmd, channel, us)``
+    where ``channel`` is the servo's position in the pin list given to
+    setup(). The sketch on the Arduino is expected to look like::
+    
+        #include <Servo.h>
+        const byte PINS[] = {3, 5, 6, 9};   // channel -> Arduino pin
+        Servo servo[4];
+        
+        void setup() {
+            Serial.begin(115200);
+            Serial.write('R');              // ready after the reset on open
+        }
+        
+        void loop() {
+            if (Serial.available() < 4) return;
+            if (Serial.peek() != 0xA5) { Serial.read(); return; }   // resync
+            byte buf[4];
+            Serial.readBytes(buf, 4);
+            byte ch = buf[1];
+            unsigned int us = buf[2] | (buf[3] << 8);
+            if (ch >= 4) return;
+            if (us == 0) { servo[ch].detach(); return; }
+            if (!servo[ch].attached()) servo[ch].attach(PINS[ch]);
+            servo[ch].writeMicroseconds(us);
+        }
+    """
+    name = 'serial'
+    
+    SERVO_CMD = 0xA5
+    
+    def __init__(self, port: str, baudrate: int):
+        self.port = port
+        self.baudrate = baudrate
+        self.conn = None
+        self.channels = {}
+    
+    def setup(self, pins: List[int]):
+        self.channels = {pin: i for i, pin in enumerate(pins)}
+        self.conn = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=3)
+        
+        # Opening the port resets most Arduinos; wait for the sketch
+        if self.conn.read(1) != b'R':
+            raise RuntimeError(f"No servo firmware responding on {self.port}")
+        self.conn.timeout = 1
+    
+    def set_pulse(self, pin: int, pulse_us: float):
+        self.conn.write(struct.pack('<BBH', self.SERVO_CMD, self.channels[pin], int(pulse_us)))
+    
+    def close(self):
+        if self.conn is None:
+            return
+        for channel in self.channels.values():
+            self.conn.write(struct.pack('<BBH', self.SERVO_CMD, channel, 0))
+        self.conn.flush()
+        self.conn.close()
+        self.conn = None
+
+def _open_backend(serial_port: Optional[str] = None,
+                  baudrate: int = 115200) -> Optional[_Backend]:
+    """
+    Open the best available servo backend, preferring pigpio
+    
+    Without pigpio, pins with a kernel hardware PWM channel are driven
+    through sysfs and only the rest use RPi.GPIO software PWM. A configured
+    serial port selects the Arduino backend instead.
+    
+    Args:
+        serial_port (str, optional): UART of an Arduino generating the pulses
+        baudrate (int): Baud rate for the Arduino link
+    
+    Returns:
+        Optional[_Backend]: Backend instance, or None if no GPIO library works
+    """
+    if serial_port is not None:
+        if SERIAL_AVAILABLE:
+            return _SerialBackend(serial_port, baudrate)
+        logging.getLogger('ServoController').warning(
+            "pyserial not available, ignoring servo serial port"
+        )
+    if PIGPIO_AVAILABLE:
+        try:
+            return _PigpioBackend()
+        except Exception as e:
+            logging.getLogger('ServoController').warning(
+                f"pigpio unavailable ({e}), falling back to RPi.GPIO"
+            )
+    if GPIO_AVAILABLE:
+        if os.path.isdir(PWM_SYSFS_CHIP):
+            return _HwPwmBackend(_GpioBackend(), PWM_SYSFS_CHIP)
+        return _GpioBackend()
+    return None
+
+class ServoController:
+    def __init__(self, serial_port: Optional[str] = None, baudrate: int = 115200):
         self.logger = logging.getLogger('ServoController')
         self.initialized = False
-        self.servo_lock = threading.Lock()
+        
+        # Arduino pulse generator; None drives the servos from the Pi's GPIO
+        self.serial_port = serial_port
+        self.baudrate = baudrate
         
         self.servo_pins = {
             'dish_azimuth': 18,
@@ -22,14 +486,20 @@ class ServoController:
             'camera_tilt': 21
         }
         
-        self.current_positions = {
+        self.home_positions = {
             'dish_azimuth': 90,
             'dish_elevation': 45,
             'camera_pan': 90,
             'camera_tilt': 90
         }
         
-        self.servo_pwm = {}
+        self.backend = None
+        
+        # Smooth-move trajectory limits (trapezoidal velocity profile)
+        self.max_speed = 40.0      # degrees per second
+        self.acceleration = 240.0  # degrees per second squared
+        # Moves smaller than this are below servo repeatability and skipped
+        self.deadband = 0.5        # degrees
         
         self.limits = {
             'dish_azimuth': (0, 180),
@@ -38,120 +508,384 @@ class ServoController:
             'camera_tilt': (30, 150)
         }
         
+        # Per-servo state as parallel arrays indexed by servo slot, so the
+        # move path indexes instead of hashing servo names
+        self._names = tuple(self.servo_pins)
+        self._name_to_idx = {name: i for i, name in enumerate(self._names)}
+        self._pins = array('i', [self.servo_pins[n] for n in self._names])
+        self._min = array('d', [self.limits[n][0] for n in self._names])
+        self._max = array('d', [self.limits[n][1] for n in self._names])
+        self._pos = np.array([self.home_positions[n] for n in self._names], dtype=np.float64)
+        # Live read-only view handed out by get_positions_raw()
+        self._pos_view = self._pos.view()
+        self._pos_view.flags.writeable = False
+        
+        # Pulse width per whole degree; fractional angles interpolate
+        self._us_lut = [angle_to_pulse_us(a) for a in range(181)]
+        
+        # Moves are executed by a motion worker. The command slot holds one
+        # pending command mapping servo name -> (angle, smooth); a newer
+        # command is merged into it per servo, so tracking never works
+        # through a backlog of stale setpoints. _active_goals holds the goals
+        # of the smooth move in progress, which a merge carries forward for
+        # the servos the newer command does not name.
+        self._cmd_q = queue.Queue(maxsize=1)
+        self._cmd_lock = threading.Lock()
+        self._active_goals = {}
+        self._motion_idle = threading.Event()
+        self._motion_idle.set()
+        self._motion_thread = None
+        
+        # Real-time scheduling for the motion worker. SCHED_FIFO needs root
+        # or CAP_SYS_NICE. pin_motion_thread is supplied by the owner of the
+        # core layout (RadropiSystem) and is called on the worker thread to
+        # pin it; None leaves the worker unpinned.
+        self.pin_motion_thread: Optional[Callable[[], None]] = None
+        self.motion_priority = 80
+        
+        # Debug logging is checked once rather than formatted per move;
+        # initialize() refreshes it after logging has been configured
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
+        
         self.logger.info("ServoController initialized")
     
+    @property
+    def current_positions(self) -> Dict[str, float]:
+        """Current angle of each servo, keyed by name"""
+        return dict(zip(self._names, self._pos.tolist()))
+    
     def initialize(self) -> bool:
-        if not GPIO_AVAILABLE:
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
+        self.backend = _open_backend(self.serial_port, self.baudrate)
+        if self.backend is None:
             self.logger.warning("GPIO not available, using mock mode")
             self.initialized = True
+            self._start_motion_worker()
             return True
         
         try:
-            self.logger.info("Initializing servo motors...")
+            self.logger.info(f"Initializing servo motors ({self.backend.name})...")
             
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setwarnings(False)
+            self.backend.setup(list(self._pins))
+            self.initialized = True
             
-            for servo_name, pin in self.servo_pins.items():
-                GPIO.setup(pin, GPIO.OUT)
-                pwm = GPIO.PWM(pin, 50)
-                pwm.start(0)
-                self.servo_pwm[servo_name] = pwm
-                self._move_servo_to_position(servo_name, self.current_positions[servo_name])
-                time.sleep(0.5)
+            # The power-on angle is unknown, so jump every servo to home at
+            # once; later commands queue behind this without waiting for it
+            for idx in range(len(self._names)):
+                self._write_pulse(idx, self._compute_pulse(self._pos[idx]))
             
-            self.initialized = True
+            self._start_motion_worker()
             self.logger.info("All servo motors initialized successfully")
             return True
             
         except Exception as e:
             self.logger.error(f"Error initializing servos: {e}")
+            self.initialized = False
             return False
     
-    def _move_servo_to_position(self, servo_name: str, angle: float):
+    def _move_servo_to_position(self, idx: int, angle: float):
         """
         Move a specific servo to the given angle
         
         Args:
-            servo_name (str): Name of the servo
+            idx (int): Servo slot (index into _names)
             angle (float): Target angle in degrees (0-180)
         """
-        if not self.initialized or not GPIO_AVAILABLE:
+        if not self.initialized or self.backend is None:
+            return
+        
+        # Clamp angle to valid range
+        angle = min(self._max[idx], max(self._min[idx], angle))
+        if abs(angle - self._pos[idx]) < self.deadband:
+            return
+        
+        if self._write_pulse(idx, self._compute_pulse(angle)):
+            self._pos[idx] = angle
+    
+    def _compute_pulse(self, angle: float) -> float:
+        """
+        Pulse width for an in-range angle
+        
+        Args:
+            angle (float): Angle in degrees (0-180)
+            
+        Returns:
+            float: Pulse width in microseconds
+        """
+        # Standard servo: 0.5 ms (0°) to 2.5 ms (180°) pulse width
+        whole = int(angle)
+        pulse_us = self._us_lut[whole]
+        if angle != whole:
+            pulse_us += (angle - whole) * (self._us_lut[whole + 1] - pulse_us)
+        return pulse_us
+    
+    def _write_pulse(self, idx: int, pulse_us: float) -> bool:
+        """
+        Send a pulse width to a servo's backend
+        
+        Args:
+            idx (int): Servo slot (index into _names)
+            pulse_us (float): Pulse width in microseconds
+            
+        Returns:
+            bool: True if the backend accepted the pulse
+        """
+        try:
+            self.backend.set_pulse(self._pins[idx], pulse_us)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error moving servo {self._names[idx]}: {e}")
+            return False
+    
+    def _start_motion_worker(self):
+        """
+        Start the thread that executes queued servo commands
+        """
+        if self._motion_thread is not None and self._motion_thread.is_alive():
+            return
+        self._motion_thread = threading.Thread(target=self._motion_worker)
+        self._motion_thread.daemon = True
+        self._motion_thread.start()
+    
+    def _make_realtime(self):
+        """
+        Give the calling thread FIFO real-time priority on the motion core
+        """
+        if self.backend is None:
+            return
+        
+        if self.pin_motion_thread is not None:
+            self.pin_motion_thread()
+        
+        if not hasattr(os, 'sched_setscheduler'):
             return
         
         try:
-            # Clamp angle to valid range
-            min_angle, max_angle = self.limits[servo_name]
-            angle = max(min_angle, min(max_angle, angle))
+            # pid 0 addresses the calling thread on Linux
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.motion_priority))
+            self.logger.info(f"Motion worker running SCHED_FIFO {self.motion_priority}")
+        except OSError as e:
+            self.logger.warning(f"Could not set real-time scheduling for motion worker: {e}")
+    
+    def _motion_worker(self):
+        """
+        Execute servo commands from the command slot until told to stop
+        """
+        self._make_realtime()
+        while True:
+            command = self._cmd_q.get()
+            if command is None:
+                break
             
-            # Convert angle to duty cycle
-            # Standard servo: 1ms (0°) to 2ms (180°) pulse width
-            # At 50Hz: 1ms = 5% duty, 2ms = 10% duty
-            duty_cycle = 2.5 + (angle / 180.0) * 10.0
+            smooth_targets = {}
+            with self._cmd_lock:
+                if not self._cmd_q.empty():
+                    # A newer command arrived before this one started; fold
+                    # this one under it and run the merged command instead
+                    newer = self._cmd_q.get_nowait()
+                    if newer is not None:
+                        command.update(newer)
+                        newer = command
+                    self._cmd_q.put_nowait(newer)
+                    continue
+                for servo_name, (angle, smooth) in command.items():
+                    if smooth:
+                        smooth_targets[servo_name] = angle
+                self._active_goals = smooth_targets
             
-            # Set PWM duty cycle
-            pwm = self.servo_pwm[servo_name]
-            pwm.ChangeDutyCycle(duty_cycle)
+            try:
+                for servo_name, (angle, smooth) in command.items():
+                    if not smooth:
+                        self._move_servo_to_position(self._name_to_idx[servo_name], angle)
+                if smooth_targets:
+                    self._move_many(smooth_targets)
+            except Exception as e:
+                self.logger.error(f"Error executing servo command: {e}")
             
-            # Update current position
-            self.current_positions[servo_name] = angle
+            with self._cmd_lock:
+                self._active_goals = {}
+                if self._cmd_q.empty():
+                    self._motion_idle.set()
+    
+    def _submit(self, command: Optional[Dict[str, Tuple[float, bool]]]):
+        """
+        Merge a command into the slot
+        
+        The command's servos override those of the pending command. Servos
+        it does not name keep their pending or in-progress goals, so when it
+        preempts the current move only the servos it names change course.
+        
+        Args:
+            command (Optional[Dict[str, Tuple[float, bool]]]): (angle, smooth)
+                per servo name, or None to stop the worker
+        """
+        with self._cmd_lock:
+            self._motion_idle.clear()
+            try:
+                pending = self._cmd_q.get_nowait()
+                has_pending = True
+            except queue.Empty:
+                pending = None
+                has_pending = False
             
-        except Exception as e:
-            self.logger.error(f"Error moving servo {servo_name}: {e}")
+            if has_pending and pending is None:
+                # A stop request wins over anything submitted after it
+                command = None
+            elif command is not None:
+                merged = {name: (goal, True) for name, goal in self._active_goals.items()}
+                if pending is not None:
+                    merged.update(pending)
+                merged.update(command)
+                command = merged
+            self._cmd_q.put_nowait(command)
+    
+    def _stop_motion_worker(self):
+        """
+        Stop the motion worker after its current command
+        """
+        if self._motion_thread is not None:
+            self._submit(None)
+            self._motion_thread.join(timeout=5)
+            self._motion_thread = None
+        self._motion_idle.set()
+    
+    def wait_for_motion(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all submitted servo commands have been executed
+        
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds
+            
+        Returns:
+            bool: True if the servos are idle
+        """
+        return self._motion_idle.wait(timeout)
     
     def move_servo(self, servo_name: str, angle: float, smooth: bool = True) -> bool:
         """
         Move a servo to a specific angle
         
+        The move is queued for the motion worker. It overrides earlier
+        commands for this servo only; other servos keep their goals.
+        
         Args:
             servo_name (str): Name of the servo to move
             angle (float): Target angle in degrees
             smooth (bool): Whether to move smoothly or jump directly
             
         Returns:
-            bool: True if movement successful
+            bool: True if the move was accepted
         """
-        if servo_name not in self.servo_pins:
-            self.logger.error(f"Unknown servo: {servo_name}")
-            return False
+        return self.move_servos({servo_name: angle}, smooth)
+    
+    def move_servos(self, targets: Dict[str, float], smooth: bool = True) -> bool:
+        """
+        Move several servos together
         
-        try:
-            with self.servo_lock:
-                if smooth:
-                    self._smooth_move(servo_name, angle)
-                else:
-                    self._move_servo_to_position(servo_name, angle)
+        Args:
+            targets (Dict[str, float]): Target angle per servo name
+            smooth (bool): Whether to move smoothly or jump directly
             
-            self.logger.debug(f"Moved {servo_name} to {angle}°")
+        Returns:
+            bool: True if the move was accepted
+        """
+        moving = False
+        for servo_name, angle in targets.items():
+            idx = self._name_to_idx.get(servo_name)
+            if idx is None:
+                self.logger.error(f"Unknown servo: {servo_name}")
+                return False
+            goal = min(self._max[idx], max(self._min[idx], angle))
+            moving = moving or abs(goal - self._pos[idx]) >= self.deadband
+        
+        # Nothing to do if the servos are idle and already there; otherwise
+        # the target still has to override pending or in-progress goals
+        if not moving and self._motion_idle.is_set():
             return True
-            
-        except Exception as e:
-            self.logger.error(f"Error moving servo {servo_name}: {e}")
-            return False
+        
+        self._submit({servo_name: (angle, smooth) for servo_name, angle in targets.items()})
+        if self._debug:
+            self.logger.debug(f"Queued move {targets}")
+        return True
+    
+    def _preempted(self) -> bool:
+        """Whether a newer command is waiting to take over the current move"""
+        return not self._cmd_q.empty()
     
-    def _smooth_move(self, servo_name: str, target_angle: float, step_size: float = 2.0):
+    @staticmethod
+    def _sleep_until(deadline_ns: int):
         """
-        Move servo smoothly to target position
+        Sleep until a CLOCK_MONOTONIC deadline with sub-millisecond accuracy
+        
+        The bulk of the wait is a regular sleep; the last millisecond is
+        spun so the wakeup does not depend on scheduler latency.
         
         Args:
-            servo_name (str): Name of the servo
-            target_angle (float): Target angle
-            step_size (float): Step size for smooth movement
+            deadline_ns (int): Deadline from time.monotonic_ns()
+        """
+        remaining = deadline_ns - time.monotonic_ns()
+        if remaining > 2_000_000:
+            time.sleep((remaining - 1_000_000) / 1e9)
+        while time.monotonic_ns() < deadline_ns:
+            pass
+    
+    def _move_many(self, targets: Dict[str, float]):
         """
-        current_angle = self.current_positions[servo_name]
+        Move several servos smoothly and in lock-step (motion worker only)
         
-        # Calculate direction and steps
-        direction = 1 if target_angle > current_angle else -1
-        steps = abs(target_angle - current_angle) / step_size
+        Each servo follows its own trapezoidal trajectory; shorter ones hold
+        their final angle until the longest finishes.
         
-        # Move in small increments
-        for i in range(int(steps)):
-            new_angle = current_angle + (direction * step_size * (i + 1))
-            self._move_servo_to_position(servo_name, new_angle)
-            time.sleep(0.05)  # Small delay for smooth movement
+        Args:
+            targets (Dict[str, float]): Target angle per servo name
+        """
+        slots = []
+        goals = []
+        for name, angle in targets.items():
+            idx = self._name_to_idx[name]
+            goal = min(self._max[idx], max(self._min[idx], angle))
+            if abs(goal - self._pos[idx]) >= self.deadband:
+                slots.append(idx)
+                goals.append(goal)
+        if not slots:
+            return
         
-        # Final position
-        self._move_servo_to_position(servo_name, target_angle)
+        table = _plan_moves(
+            self._pos[slots], np.array(goals),
+            float(self.max_speed), float(self.acceleration), 1.0 / SERVO_FREQUENCY
+        )
+        
+        pins = [self._pins[idx] for idx in slots]
+        pulses = angle_to_pulse_us(table)
+        backend = self.backend if self.initialized else None
+        
+        # Hand the trajectory to the hardware when the backend can; it stops
+        # early if a newer command arrives
+        if backend is not None:
+            played = backend.play(pins, pulses, self._preempted)
+            if played is not None:
+                if played:
+                    self._pos[slots] = table[played - 1]
+                return
+        
+        # Otherwise step once per servo frame on a drift-free schedule
+        set_pulse = backend.set_pulse if backend is not None else None
+        step_ns = 1_000_000_000 // SERVO_FREQUENCY
+        deadline_ns = time.monotonic_ns()
+        try:
+            for i, row_us in enumerate(pulses.tolist()):
+                if i:
+                    deadline_ns += step_ns
+                    self._sleep_until(deadline_ns)
+                # A newer command takes over from wherever the servos are now
+                if self._preempted():
+                    return
+                if set_pulse is not None:
+                    for pin, pulse_us in zip(pins, row_us):
+                        set_pulse(pin, pulse_us)
+                self._pos[slots] = table[i]
+        except Exception as e:
+            self.logger.error(f"Error during smooth move: {e}")
     
     def move_dish_to_coordinates(self, azimuth: float, elevation: float) -> bool:
         """
@@ -164,23 +898,18 @@ class ServoController:
         Returns:
             bool: True if movement successful
         """
-        try:
-            # Convert azimuth to servo range (0-180)
-            servo_azimuth = (azimuth % 360) * 180 / 360
-            
-            # Move both servos
-            success_az = self.move_servo('dish_azimuth', servo_azimuth)
-            success_el = self.move_servo('dish_elevation', elevation)
-            
-            if success_az and success_el:
-                self.logger.info(f"Dish positioned to Az: {azimuth}°, El: {elevation}°")
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Error positioning dish: {e}")
+        # Convert azimuth to servo range (0-180)
+        servo_azimuth = (azimuth % 360) * 180 / 360
+        
+        # Move both axes together
+        if not self.move_servos({
+            'dish_azimuth': servo_azimuth,
+            'dish_elevation': elevation
+        }):
             return False
+        
+        self.logger.info(f"Dish positioning to Az: {azimuth}°, El: {elevation}°")
+        return True
     
     def move_camera_to_coordinates(self, pan: float, tilt: float) -> bool:
         """
@@ -193,57 +922,92 @@ class ServoController:
         Returns:
             bool: True if movement successful
         """
-        try:
-            success_pan = self.move_servo('camera_pan', pan)
-            success_tilt = self.move_servo('camera_tilt', tilt)
-            
-            if success_pan and success_tilt:
-                self.logger.info(f"Camera positioned to Pan: {pan}°, Tilt: {tilt}°")
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Error positioning camera: {e}")
+        # Move both axes together
+        if not self.move_servos({'camera_pan': pan, 'camera_tilt': tilt}):
             return False
+        
+        self.logger.info(f"Camera positioning to Pan: {pan}°, Tilt: {tilt}°")
+        return True
     
-    def track_objects(self, detections: List[Dict]):
+    def _select_target(self, detections: List[Dict]) -> Tuple[float, float, float]:
         """
-        Track detected objects by adjusting camera and dish positions
+        Pick the most confident detection and convert it to camera angles
         
         Args:
-            detections (List[Dict]): List of detected objects with coordinates
+            detections (List[Dict]): Non-empty list of detected objects with
+                normalized 0-1 coordinates
+            
+        Returns:
+            Tuple[float, float, float]: Pan angle, tilt angle and confidence
         """
-        if not detections:
-            return
-        
-        try:
-            # Find the most significant detection (highest confidence)
-            primary_detection = max(detections, key=lambda x: x.get('confidence', 0))
+        if len(detections) == 1:
+            # Common case: a single target, nothing to rank
+            primary = detections[0]
+            x, y = primary['coordinates']
+            confidence = primary.get('confidence', 0)
             
+            # X maps to pan (0-180 degrees), Y maps to tilt (30-150 degrees)
+            pan_angle = float(x * 180)
+            tilt_angle = float(30 + y * 120)
+        else:
             # Extract object coordinates (assuming normalized 0-1 coordinates)
-            x, y = primary_detection['coordinates']
+            n = len(detections)
+            # Index each pair so tuple and list coordinates both work
+            xs = np.fromiter(
+                (d['coordinates'][0] for d in detections), dtype='f8', count=n
+            )
+            ys = np.fromiter(
+                (d['coordinates'][1] for d in detections), dtype='f8', count=n
+            )
+            confidences = np.fromiter(
+                (d.get('confidence', 0) for d in detections), dtype='f8', count=n
+            )
             
             # Convert to servo angles
             # X coordinate maps to pan (0-180 degrees)
-            pan_angle = x * 180
+            pan_angles = xs * 180
             
             # Y coordinate maps to tilt (30-150 degrees)
-            tilt_angle = 30 + (y * 120)
+            tilt_angles = 30 + ys * 120
             
-            # Move camera to track object
-            self.move_camera_to_coordinates(pan_angle, tilt_angle)
-            
-            # For significant detections, also point dish in same direction
-            if primary_detection.get('confidence', 0) > 0.8:
-                # Convert camera coordinates to dish coordinates
-                dish_azimuth = pan_angle * 2  # Scale to 0-360 range
-                dish_elevation = min(90, tilt_angle - 30)  # Adjust for dish limits
-                
-                self.move_dish_to_coordinates(dish_azimuth, dish_elevation)
-            
-        except Exception as e:
+            # Track the most significant detection (highest confidence)
+            primary = int(confidences.argmax())
+            pan_angle = float(pan_angles[primary])
+            tilt_angle = float(tilt_angles[primary])
+            confidence = float(confidences[primary])
+        
+        return pan_angle, tilt_angle, confidence
+    
+    def track_objects(self, detections: List[Dict]):
+        """
+        Track detected objects by adjusting camera and dish positions
+        
+        Args:
+            detections (List[Dict]): List of detected objects with coordinates
+        """
+        if not detections:
+            return
+        
+        try:
+            pan_angle, tilt_angle, confidence = self._select_target(detections)
+        except (KeyError, TypeError, ValueError) as e:
             self.logger.error(f"Error tracking objects: {e}")
+            return
+        
+        # Move camera to track object
+        targets = {'camera_pan': pan_angle, 'camera_tilt': tilt_angle}
+        
+        # For significant detections, also point dish in same direction
+        if confidence > 0.8:
+            # Convert camera coordinates to dish coordinates
+            dish_azimuth = pan_angle * 2  # Scale to 0-360 range
+            dish_elevation = min(90, tilt_angle - 30)  # Adjust for dish limits
+            
+            targets['dish_azimuth'] = (dish_azimuth % 360) * 180 / 360
+            targets['dish_elevation'] = dish_elevation
+        
+        # One command, so camera and dish retarget together
+        self.move_servos(targets)
     
     def home_all_servos(self) -> bool:
         """
@@ -255,21 +1019,10 @@ class ServoController:
         try:
             self.logger.info("Homing all servos...")
             
-            # Home positions
-            home_positions = {
-                'dish_azimuth': 90,
-                'dish_elevation': 45,
-                'camera_pan': 90,
-                'camera_tilt': 90
-            }
-            
-            success = True
-            for servo_name, angle in home_positions.items():
-                if not self.move_servo(servo_name, angle):
-                    success = False
+            success = self.move_servos(self.home_positions)
             
             if success:
-                self.logger.info("All servos homed successfully")
+                self.logger.info("Servo homing queued")
             else:
                 self.logger.warning("Some servos failed to home")
             
@@ -286,8 +1039,17 @@ class ServoController:
         Returns:
             Dict[str, float]: Current servo positions
         """
-        with self.servo_lock:
-            return self.current_positions.copy()
+        return dict(zip(self._names, self._pos.tolist()))
+    
+    def get_positions_raw(self) -> np.ndarray:
+        """
+        Get current positions of all servos without building a dict
+        
+        Returns:
+            np.ndarray: Read-only live view of the servo angles, ordered as
+            servo_pins
+        """
+        return self._pos_view
     
     def get_status(self) -> Dict:
         """
@@ -298,7 +1060,8 @@ class ServoController:
         """
         return {
             'initialized': self.initialized,
-            'gpio_available': GPIO_AVAILABLE,
+            'gpio_available': self.backend is not None,
+            'backend': self.backend.name if self.backend is not None else 'mock',
             'servo_count': len(self.servo_pins),
             'current_positions': self.get_positions(),
             'limits': self.limits.copy()
@@ -311,17 +1074,16 @@ class ServoController:
         self.logger.info("Shutting down servo controller...")
         
         try:
-            # Home all servos before shutdown
-            self.home_all_servos()
-            time.sleep(1)
-            
-            # Stop all PWM signals
-            for pwm in self.servo_pwm.values():
-                pwm.stop()
+            # Abandon queued tracking and home every axis in one
+            # coordinated move; the final pulses are in place once it returns
+            self._stop_motion_worker()
+            if self.initialized:
+                self._move_many(self.home_positions)
             
-            # Cleanup GPIO
-            if GPIO_AVAILABLE:
-                GPIO.cleanup()
+            # Stop all pulses and release the GPIO library
+            if self.backend is not None:
+                self.backend.close()
+                self.backend = None
             
             self.initialized = False
             self.logger.info("Servo controller shutdown complete")
@@ -336,30 +1098,25 @@ class MockServoController(ServoController):
     """
     
     def __init__(self):
-        self.logger = logging.getLogger('MockServoController')
-        self.initialized = False
-        self.servo_lock = threading.Lock()
-        
         # Same configuration as real controller
-        self.current_positions = {
-            'dish_azimuth': 90,
-            'dish_elevation': 45,
-            'camera_pan': 90,
-            'camera_tilt': 90
-        }
-        
+        super().__init__()
+        self.logger = logging.getLogger('MockServoController')
         self.logger.info("MockServoController initialized")
     
     def initialize(self) -> bool:
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
         self.initialized = True
+        self._start_motion_worker()
         self.logger.info("Mock servo controller initialized")
         return True
     
-    def _move_servo_to_position(self, servo_name: str, angle: float):
+    def _move_servo_to_position(self, idx: int, angle: float):
         # Just update the position without actual hardware control
-        self.current_positions[servo_name] = angle
-        self.logger.debug(f"Mock servo {servo_name} moved to {angle}°")
+        self._pos[idx] = angle
+        if self._debug:
+            self.logger.debug(f"Mock servo {self._names[idx]} moved to {angle}°")
     
     def shutdown(self):
+        self._stop_motion_worker()
         self.initialized = False
         self.logger.info("Mock servo controller shutdown")
\ No newline at end of file
@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servo_controller import MockServoController
+
+
+class SelectTargetTest(unittest.TestCase):
+    def setUp(self):
+        self.servos = MockServoController()
+
+    def test_list_coordinates_with_several_detections(self):
+        detections = [
+            {'coordinates': [0.25, 0.5], 'confidence': 0.4},
+            {'coordinates': [0.5, 0.75], 'confidence': 0.9},
+        ]
+        pan, tilt, confidence = self.servos._select_target(detections)
+        self.assertAlmostEqual(pan, 90.0)
+        self.assertAlmostEqual(tilt, 120.0)
+        self.assertAlmostEqual(confidence, 0.9)
+
+    def test_tuple_coordinates_with_several_detections(self):
+        detections = [
+            {'coordinates': (0.25, 0.5), 'confidence': 0.9},
+            {'coordinates': (0.5, 0.75)},
+        ]
+        pan, tilt, confidence = self.servos._select_target(detections)
+        self.assertAlmostEqual(pan, 45.0)
+        self.assertAlmostEqual(tilt, 90.0)
+        self.assertAlmostEqual(confidence, 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()